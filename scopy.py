@@ -1,6 +1,23 @@
 import argparse
+import functools
+import operator
 import os
 import re
+import sys
+
+
+MAX_WIDTH = 50
+COLUMNS = '{{0:<{}}} {{2:<8}} {{3:<8}} {{1}}'.format(MAX_WIDTH)
+_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+_SYMBOLS = frozenset('.$%_-')
+_SYMBOL_RE = re.compile(r'[\s.$%_-]+')
+
+if os.sep == '/':
+    def _normalize(path):
+        return path
+else:
+    def _normalize(path):
+        return path.replace(os.sep, '/')
 
 
 class Scopy:
@@ -18,10 +35,13 @@ class Scopy:
         self.ext = self._set_extensions(args.ext)
         self.no_subs = args.no_subs
         self.filters = args.filters
+        self._filters_lower = tuple(filt.lower() for filt in args.filters) if args.filters else None
         self.ignore = args.ignore
+        self._ignore_lower = [word.lower() for word in (args.ignore or [])]
         self.minsize = self._set_minsize(args.minsize)
         self.raw = args.raw
         self.sort_by = args.sort_by
+        self._sort_key = self._set_sort_key(args.sort_by)
         self.descending = args.descending
         self.verbose = args.verbose
         self.outfile = self._set_outfile(args.outfile)
@@ -40,8 +60,7 @@ class Scopy:
         results = self.get_results()
         if results:
             sorted_results = self.sort_results(results)
-            formatted_content = self.format_results(sorted_results)
-            self.output_results(formatted_content)
+            self.output_results(self._iter_rows(sorted_results))
 
     def get_results(self):
         """Gets the results for the provided arguments.
@@ -71,14 +90,7 @@ class Scopy:
         of those. For example: first sort by directory, then by name.
         Returns the sorted list of tuples.
         """
-        translate = {
-            'n': 0,
-            'e': 1,
-            's': 2,
-            'd': 3,
-        }
-        sort_order = lambda x: [x[translate[column]] for column in self.sort_by]
-        return sorted(results, key=sort_order, reverse=self.descending)
+        return sorted(results, key=self._sort_key, reverse=self.descending)
 
     def format_results(self, results):
         """Formats the results in four columns. Trims too long columns.
@@ -95,86 +107,117 @@ class Scopy:
         side by side on a typical computer screen.
 
         Returns a string containing all the results.
+        If there are no results, only the header is returned (in verbose mode).
         """
-        def _trimmed(filename, path):
-            relative_path = path[HOME_LENGTH:].replace('\\', '/')
-            if not self.raw:
-                filename = self._replace_symbols(filename)
-
-            if len(filename) > MAX_WIDTH:
-                filename = filename[:MAX_WIDTH-3] + '...'
-            if len(relative_path) > MAX_WIDTH:
-                while len(relative_path) > MAX_WIDTH-3:
-                    relative_path = relative_path[relative_path.find('/', 1):]
-                relative_path = '...' + relative_path
-            return filename, relative_path
-
-        MAX_WIDTH = 50
-        COLUMNS = '{0:<{WIDTH}} {2:<8} {3:<8} {1}'
-        HOME_LENGTH = len(self.directory)
-
-        column_names = COLUMNS.format(
-            'Filename:', 'Relative path:', 'Ext:', 'Size:',
-            WIDTH=MAX_WIDTH
-        )
-        results_string = '\n'.join(
-            COLUMNS.format(
-                *_trimmed(filename, path),
-                ext,
-                self._convert_bytes(size),
-                WIDTH=MAX_WIDTH)
-            for filename, ext, size, path in results)
-
-        if self.verbose:
-            header = self._get_header(results)
-            return '\n\n\n'.join([header, '\n'.join([column_names, results_string])])
-        else:
-            return '\n'.join(['', column_names, results_string])
+        return '\n'.join(self._iter_rows(results))
 
     def output_results(self, contents):
         """Outputs given content, either to a file or to the console.
 
         Args:
             contents: string with all the results
-                      provided by `format_results` method
+                      provided by `format_results` method,
+                      or an iterable of lines, which is written line by line
 
         If `outfile` attribute is provided, writes to a file.
         Otherwise, prints to the console.
         """
-        self._write_to_file(contents) if self.outfile else print(contents)
+        lines = [contents] if isinstance(contents, str) else contents
+        if self.outfile:
+            self._write_to_file(lines)
+        else:
+            sys.stdout.writelines(line + '\n' for line in lines)
 
 
     def _search_directory(self, directory):
-        results = []
-        for file in os.listdir(directory):
-            filepath = os.path.join(directory, file)
-            if os.path.isfile(filepath):
-                filename, ext = self._split(file)
-                filesize = os.path.getsize(filepath)
-                if self._satisfies_filters(filename, ext, filesize):
-                    results.append((filename, ext, filesize, directory))
-        return results
+        return self._scan(directory, recursive=False)[0]
 
     def _search_all(self):
-        def _ignore_directories(dirs):
-            for d in dirs:
-                if any(word.lower() in d.lower() for word in self.ignore):
-                    dirs.remove(d)
-            return dirs
-
         results = []
-        for path, dirs, _ in os.walk(self.directory):
-            if self.ignore:
-                dirs = _ignore_directories(dirs)
-            results.extend(self._search_directory(path))
+        stack = [self.directory]
+        while stack:
+            files, subdirs = self._scan(stack.pop())
+            results.extend(files)
+            stack.extend(reversed(subdirs))
         return results
 
-    def _satisfies_filters(self, filename, ext, filesize):
-        is_valid_file = any(filt.lower() in filename.lower()
-                            for filt in self.filters) if self.filters else True
-        is_valid_ext = ext in self.ext
-        is_valid_size = filesize >= self.minsize
-        return is_valid_file and is_valid_ext and is_valid_size
+    def _scan(self, path, recursive=True):
+        results, subdirs = [], []
+        directory = _normalize(path)
+        try:
+            entries = os.scandir(path)
+        except OSError:
+            return results, subdirs
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive and not self._is_ignored(entry.name):
+                        subdirs.append(entry.path)
+                elif entry.is_file():
+                    filename, dot, ext = entry.name.rpartition('.')
+                    if dot:
+                        ext = dot + ext
+                    else:
+                        filename, ext = ext, ''
+                    if not self._satisfies_filters(filename, ext):
+                        continue
+                    filesize = entry.stat().st_size
+                    if filesize >= self.minsize:
+                        results.append((filename, ext, filesize, directory))
+        return results, subdirs
+
+    def _is_ignored(self, dirname):
+        dirname = dirname.lower()
+        return any(word in dirname for word in self._ignore_lower)
+
+    def _satisfies_filters(self, filename, ext):
+        if ext.lower() not in self.ext:
+            return False
+        if self._filters_lower:
+            filename = filename.lower()
+            if not any(filt in filename for filt in self._filters_lower):
+                return False
+        return True
+
+    def _iter_rows(self, results):
+        if not results:
+            if self.verbose:
+                yield from self._get_header(results)
+            return
+
+        def _trimmed(filename, path):
+            relative_path = path[HOME_LENGTH:]
+            if not raw:
+                filename = replace_symbols(filename)
+
+            if len(filename) > MAX_WIDTH:
+                filename = filename[:MAX_WIDTH-3] + '...'
+            if len(relative_path) > MAX_WIDTH:
+                parts = relative_path.lstrip('/').split('/')
+                lengths = [len(part) + 1 for part in parts]
+                total = sum(lengths)
+                start = 0
+                while total > MAX_WIDTH-3 and start < len(parts) - 1:
+                    total -= lengths[start]
+                    start += 1
+                relative_path = '...' + ('/' + '/'.join(parts[start:]))[-(MAX_WIDTH-3):]
+            return filename, relative_path
+
+        HOME_LENGTH = len(self.directory)
+        raw = self.raw
+        replace_symbols = self._replace_symbols
+        convert_bytes = self._convert_bytes
+        format_row = COLUMNS.format
+
+        if self.verbose:
+            yield from self._get_header(results)
+            yield ''
+            yield ''
+        else:
+            yield ''
+        yield COLUMNS.format('Filename:', 'Relative path:', 'Ext:', 'Size:')
+        for filename, ext, size, path in results:
+            yield format_row(*_trimmed(filename, path), ext, convert_bytes(size))
 
     def _get_header(self, results):
         header = [('', '')]
@@ -185,19 +228,18 @@ class Scopy:
             header.append(('Looking for files containing:', ', '.join(self.filters)))
         header.append(('With extensions:', ', '.join(self.ext)))
         header.append(('Found:', '{} files'.format(len(results))))
-        return '\n'.join('{0:<36}{1}'.format(*line) for line in header)
+        return ['{0:<36}{1}'.format(*line) for line in header]
 
-    def _write_to_file(self, contens):
+    def _write_to_file(self, lines):
         with open(self.outfile, 'w') as f:
-            f.writelines(contens)
-            f.writelines('\n\n\nCreated with Scopy. https://github.com/narimiran/scopy \n')
+            f.writelines(line + '\n' for line in lines)
+            f.write('\n\nCreated with Scopy. https://github.com/narimiran/scopy \n')
         print('Results saved in {}'.format(self.outfile))
 
 
     @staticmethod
     def _set_extensions(extensions):
-        return {'.{}'.format(ext) if not ext.startswith('.') else ext
-                for ext in extensions}
+        return frozenset('.' + ext.lstrip('.').lower() for ext in extensions)
 
     @staticmethod
     def _set_minsize(minsize):
@@ -221,6 +263,17 @@ class Scopy:
         else:
             return parse_size(minsize)
 
+    @staticmethod
+    def _set_sort_key(sort_by):
+        translate = {
+            'n': 0,
+            'e': 1,
+            's': 2,
+            'd': 3,
+        }
+        columns = [translate[column] for column in sort_by]
+        return operator.itemgetter(*columns) if columns else (lambda result: ())
+
     @staticmethod
     def _set_outfile(outfile):
         if outfile:
@@ -229,20 +282,16 @@ class Scopy:
         return outfile
 
     @staticmethod
-    def _split(file):
-        ext_index = file.rfind('.')
-        return file[:ext_index], file[ext_index:]
-
-    @staticmethod
+    @functools.lru_cache(maxsize=8192)
     def _replace_symbols(filename):
-        return ' '.join(re.sub(r'[.$%_-]', ' ', filename).split()).title()
+        if _SYMBOLS.isdisjoint(filename):
+            return ' '.join(filename.split()).title()
+        return _SYMBOL_RE.sub(' ', filename).strip().title()
 
     @staticmethod
     def _convert_bytes(size):
-        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-            if size < 1024:
-                return '{:3.0f} {:>2}'.format(size, unit)
-            size /= 1024
+        index = min(max(size.bit_length() - 1, 0) // 10, len(_UNITS) - 1)
+        return '{:3.0f} {:>2}'.format(size / (1 << (10 * index)), _UNITS[index])
 
 
 def arg_parser():